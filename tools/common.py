@@ -18,10 +18,13 @@ from __future__ import annotations
 
 import dataclasses
 import io
+import mmap
+import os
 import re
 import struct
+from itertools import starmap
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Dict
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Dict, Union
 
 
 # ---------------------------------------------------------------------------
@@ -41,6 +44,181 @@ def _write_le_uint32(value: int) -> bytes:
     return struct.pack("<I", value & 0xFFFFFFFF)
 
 
+_BIT_MASKS = tuple((1 << width) - 1 for width in range(33))
+_REVERSED_BITS = bytes(int(f"{value:08b}"[::-1], 2) for value in range(256))
+_unpack_metadata = struct.Struct(">III").unpack_from
+
+
+def _refill_bits(
+    reversed_src: bytes,
+    src_pos: int,
+    bit_buf: int,
+    bit_count: int,
+    needed: int,
+) -> Tuple[int, int, int]:
+    """Fetches 32-bit words until the bit queue holds at least *needed* bits.
+
+    The interpreter consumes each word LSB first.  We queue the bits MSB first
+    instead (using the pre-reversed copy of the stream) so multi-bit fields can
+    be extracted with a single shift and mask.  Only the words the C++
+    ``getBit`` would fetch by then are consumed; consecutive words sit next to
+    each other in the reversed stream, so they are loaded with one
+    ``int.from_bytes`` call however many are needed.
+    """
+
+    words = (needed - bit_count + 31) >> 5
+    start = src_pos + 1 - 4 * words
+    if start < 0:
+        raise ByteKillerError("compressed stream truncated while reading metadata")
+    bit_buf = ((bit_buf & ((1 << bit_count) - 1)) << (32 * words)) | int.from_bytes(
+        reversed_src[start : src_pos + 1], "little"
+    )
+    return start - 1, bit_buf, bit_count + 32 * words
+
+
+def _bytekiller_core(src: bytes, dst: bytearray, unpacked_size: int) -> int:
+    """Runs the ByteKiller decode loop over *src*, appending to *dst*.
+
+    The interpreter fills its output buffer from the end towards the start.
+    We emit the very same byte sequence front to back instead, so *dst* holds
+    the unpacked data in reverse order once the loop finishes and the caller
+    flips it with a single ``reverse()``.  Decoding forwards turns literals
+    and back-references into plain appends.
+
+    The loop keeps all of its state in plain locals so CPython never has to go
+    through closure cells or nested calls while decoding.  Returns the final
+    checksum; the caller validates it along with the output size.
+    """
+
+    # State mapping to ``ByteKiller`` in src/bytekiller.cc:
+    #
+    #   src_pos              _srcptr (index of the last unread byte)
+    #   out_pos              unpackedSize - 1 - (_dstptr - _buffer), i.e. the
+    #                        number of bytes written so far
+    #   remaining            _length
+    #   checksum             _check (folded once at the end, see below)
+    #   bit_buf, bit_count   _chunk, minus its sentinel bit; bits are queued
+    #                        MSB first so getBits(n) is one shift and mask
+    #
+    # getBit/getBits collapse into ``bit_count -= n`` plus a shift; the only
+    # call left in the loop is the refill, which runs once per 32 bits.
+
+    if len(src) < 12:
+        raise ByteKillerError("compressed stream truncated while reading metadata")
+
+    reversed_src = src.translate(_REVERSED_BITS)
+    refill = _refill_bits
+    masks = _BIT_MASKS
+
+    src_pos = len(src) - 13
+    out_pos = 0
+
+    chunk, checksum, remaining = _unpack_metadata(src, len(src) - 12)
+
+    # The bit queue holds the not yet consumed bits of the current chunk, most
+    # significant bit first.  The first chunk carries a sentinel above its
+    # payload bits; every subsequently fetched word carries 32 payload bits.
+    bit_count = max(chunk.bit_length() - 1, 0)
+    bit_buf = int.from_bytes(chunk.to_bytes(4, "big").translate(_REVERSED_BITS), "little") >> (32 - bit_count)
+
+    while remaining > 0:
+        if bit_count < 1:
+            src_pos, bit_buf, bit_count = refill(reversed_src, src_pos, bit_buf, bit_count, 1)
+        bit_count -= 1
+        if (bit_buf >> bit_count) & 1:
+            code, width = 0x04, 2
+        else:
+            code, width = 0x00, 1
+        if bit_count < width:
+            src_pos, bit_buf, bit_count = refill(reversed_src, src_pos, bit_buf, bit_count, width)
+        bit_count -= width
+        code |= (bit_buf >> bit_count) & masks[width]
+
+        if code == 0x00 or code == 0x07:  # 0b00ccc / 0b111cccccccc
+            width = 3 if code == 0x00 else 8
+            if bit_count < width:
+                src_pos, bit_buf, bit_count = refill(reversed_src, src_pos, bit_buf, bit_count, width)
+            bit_count -= width
+            count = ((bit_buf >> bit_count) & masks[width]) + (1 if code == 0x00 else 9)
+            if count > unpacked_size - out_pos:
+                # The interpreter reads the first literal that no longer fits
+                # before it notices the overflow, which may hit the end of
+                # the stream first.
+                width = 8 * (unpacked_size - out_pos + 1)
+                if bit_count < width:
+                    refill(reversed_src, src_pos, bit_buf, bit_count, width)
+                raise ByteKillerError("destination buffer overflow")
+            # Literal bytes are queued back to back, so the whole run is
+            # sliced out of the bit queue at once.
+            width = 8 * count
+            if bit_count < width:
+                src_pos, bit_buf, bit_count = refill(reversed_src, src_pos, bit_buf, bit_count, width)
+            bit_count -= width
+            dst += ((bit_buf >> bit_count) & ((1 << width) - 1)).to_bytes(count, "big")
+            out_pos += count
+            remaining -= count
+            continue
+
+        if code == 0x01:  # 0b01oooooooo
+            count, width = 2, 8
+        elif code == 0x04:  # 0b100ooooooooo
+            count, width = 3, 9
+        elif code == 0x05:  # 0b101oooooooooo
+            count, width = 4, 10
+        elif code == 0x06:  # 0b110ccccccccoooooooooooo
+            if bit_count < 8:
+                src_pos, bit_buf, bit_count = refill(reversed_src, src_pos, bit_buf, bit_count, 8)
+            bit_count -= 8
+            count, width = ((bit_buf >> bit_count) & 0xFF) + 1, 12
+        else:
+            raise ByteKillerError(f"unsupported pattern code 0x{code:02x}")
+
+        if bit_count < width:
+            src_pos, bit_buf, bit_count = refill(reversed_src, src_pos, bit_buf, bit_count, width)
+        bit_count -= width
+
+        # Back-references point ``offset + 1`` bytes behind the write position
+        # (in the interpreter: ahead of it, as it writes backwards).  The source
+        # index only grows during the copy, so validating the first byte covers
+        # the whole run.
+        distance = ((bit_buf >> bit_count) & masks[width]) + 1
+        if distance > out_pos:
+            raise ByteKillerError("copy offset outside of already decoded data")
+        if count > unpacked_size - out_pos:
+            raise ByteKillerError("destination buffer overflow")
+        start = out_pos - distance
+        if distance >= count:
+            # The source run lies entirely in already decoded data.
+            dst += dst[start : start + count]
+        else:
+            # Overlapping (RLE-style) runs re-read bytes written by this very
+            # copy, which amounts to repeating the last ``distance`` bytes.
+            dst += (dst[start:out_pos] * (count // distance + 1))[:count]
+        out_pos += count
+        remaining -= count
+
+    # The interpreter XORs every fetched word (the first chunk included) into
+    # the checksum; the final value must be zero for the stream to be
+    # considered valid.  The fetched words form one contiguous run, so we fold
+    # them in a single pass once decoding is done instead of per refill.
+    return checksum ^ _xor_words(src[src_pos + 1 : len(src) - 8])
+
+
+def _xor_words(data: bytes) -> int:
+    """XORs together the 32-bit words of *data* (a multiple of 4 bytes long)."""
+
+    # Fold the run as one integer, XORing its upper words onto the lower ones
+    # until a single word remains; each step is one big-integer operation.
+    value = int.from_bytes(data, "big")
+    words = len(data) // 4
+    while words > 1:
+        kept = words - words // 2
+        shift = 32 * kept
+        value = (value >> shift) ^ (value & ((1 << shift) - 1))
+        words = kept
+    return value
+
+
 def bytekiller_decompress(data: bytes, unpacked_size: int) -> bytes:
     """Decompresses *data* using the ByteKiller algorithm.
 
@@ -54,109 +232,16 @@ def bytekiller_decompress(data: bytes, unpacked_size: int) -> bytes:
     if unpacked_size <= 0:
         return b""
 
-    src = memoryview(data)
-    dst = bytearray(unpacked_size)
-
-    src_pos = len(src) - 1
-    dst_pos = len(dst) - 1
-
-    def fetch_long() -> int:
-        nonlocal src_pos
-        if src_pos < 3:
-            raise ByteKillerError("compressed stream truncated while reading metadata")
-        value = 0
-        for shift in (0, 8, 16, 24):
-            value |= src[src_pos] << shift
-            src_pos -= 1
-        return value
-
-    def write_byte(byte: int) -> None:
-        nonlocal dst_pos, remaining
-        if dst_pos < 0:
-            raise ByteKillerError("destination buffer overflow")
-        dst[dst_pos] = byte & 0xFF
-        dst_pos -= 1
-        remaining -= 1
-
-    def copy_bytes(offset: int, count: int) -> None:
-        # The stream is decoded backwards.  Previously written bytes reside at
-        # higher indices (dst_pos + offset + 1).
-        for _ in range(count):
-            src_index = dst_pos + offset + 1
-            if not (0 <= src_index < len(dst)):
-                raise ByteKillerError("copy offset outside of already decoded data")
-            write_byte(dst[src_index])
-
-    def read_bits(count: int) -> int:
-        result = 0
-        bit_count = count
-        while bit_count:
-            bit = get_bit()
-            result = (result << 1) | bit
-            bit_count -= 1
-        return result
-
-    remaining = fetch_long()
-    checksum = fetch_long()
-    chunk = fetch_long()
-    checksum ^= chunk
-
-    # Consume the stream.  After each 32-bit block we XOR the checksum just
-    # like the interpreter; the final value must be zero for the stream to be
-    # considered valid.
-    def get_bit() -> int:
-        nonlocal chunk, checksum, src_pos
-        bit = chunk & 0x1
-        chunk >>= 1
-        if chunk == 0:
-            chunk = fetch_long()
-            checksum ^= chunk
-            bit = chunk & 0x1
-            chunk = (chunk >> 1) | (1 << 31)
-        return bit
-
-    while remaining > 0:
-        code = get_bit()
-        if code == 0:
-            code = (code << 1) | read_bits(1)
-        else:
-            code = (code << 2) | read_bits(2)
-
-        if code == 0x00:
-            count = read_bits(3) + 1
-            for _ in range(count):
-                write_byte(read_bits(8))
-        elif code == 0x07:
-            count = read_bits(8) + 9
-            for _ in range(count):
-                write_byte(read_bits(8))
-        elif code == 0x01:
-            count = 2
-            offset = read_bits(8)
-            copy_bytes(offset, count)
-        elif code == 0x04:
-            count = 3
-            offset = read_bits(9)
-            copy_bytes(offset, count)
-        elif code == 0x05:
-            count = 4
-            offset = read_bits(10)
-            copy_bytes(offset, count)
-        elif code == 0x06:
-            count = read_bits(8) + 1
-            offset = read_bits(12)
-            copy_bytes(offset, count)
-        else:
-            raise ByteKillerError(f"unsupported pattern code 0x{code:02x}")
+    dst = bytearray()
+    checksum = _bytekiller_core(bytes(data), dst, unpacked_size)
 
     if checksum != 0:
         raise ByteKillerError("checksum mismatch while unpacking ByteKiller stream")
 
-    if dst_pos != -1:
-        # We filled the buffer backwards, so finishing with -1 means the
-        # buffer has been exactly populated.
+    if len(dst) != unpacked_size:
         raise ByteKillerError("decompressed size mismatch")
 
+    dst.reverse()
     return bytes(dst)
 
 
@@ -186,8 +271,10 @@ def bytekiller_compress(data: bytes) -> bytes:
 
 MEMLIST_ENTRY_SIZE = 20
 
+_MEMLIST_STRUCT = struct.Struct(">BBHHBBIHHHH")
+
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class MemListEntry:
     state: int
     type: int
@@ -201,68 +288,76 @@ class MemListEntry:
     unused5: int
     unpacked_size: int
 
-    @classmethod
-    def from_bytes(cls, data: bytes) -> "MemListEntry":
-        if len(data) != MEMLIST_ENTRY_SIZE:
-            raise ValueError("invalid MEMLIST entry size")
-        fields = struct.unpack(
-            ">BBHHBBIHHHH", data
-        )
-        return cls(*fields)
-
-    def to_bytes(self) -> bytes:
-        return struct.pack(
-            ">BBHHBBIHHHH",
-            self.state,
-            self.type,
-            self.unused1,
-            self.unused2,
-            self.unused3,
-            self.bank_id,
-            self.bank_offset,
-            self.unused4,
-            self.packed_size,
-            self.unused5,
-            self.unpacked_size,
-        )
-
     @property
     def is_terminal(self) -> bool:
         return self.type == 0xFF
 
 
+def _entry_fields(entry: MemListEntry) -> Tuple[int, ...]:
+    return (
+        entry.state,
+        entry.type,
+        entry.unused1,
+        entry.unused2,
+        entry.unused3,
+        entry.bank_id,
+        entry.bank_offset,
+        entry.unused4,
+        entry.packed_size,
+        entry.unused5,
+        entry.unpacked_size,
+    )
+
+
+def unpack_entry(data: bytes) -> MemListEntry:
+    if len(data) != MEMLIST_ENTRY_SIZE:
+        raise ValueError("invalid MEMLIST entry size")
+    return MemListEntry(*_MEMLIST_STRUCT.unpack(data))
+
+
+def pack_entry(entry: MemListEntry) -> bytes:
+    return _MEMLIST_STRUCT.pack(*_entry_fields(entry))
+
+
+def clone_entry(entry: MemListEntry) -> MemListEntry:
+    return MemListEntry(*_entry_fields(entry))
+
+
 class MemList:
     """Utility helpers for working with ``MEMLIST.BIN`` files."""
 
     def __init__(self, entries: List[MemListEntry]):
         self.entries = entries
+        # ``(resource_id, entry)`` pairs up to and including the terminal
+        # entry, computed once; ``entries`` is not expected to change later.
+        self.resources: List[Tuple[int, MemListEntry]] = list(enumerate(entries))
+        for index, entry in enumerate(entries):
+            if entry.is_terminal:
+                del self.resources[index + 1 :]
+                break
 
     @classmethod
     def load(cls, path: Path) -> "MemList":
         data = path.read_bytes()
-        entries: List[MemListEntry] = []
-        for offset in range(0, len(data), MEMLIST_ENTRY_SIZE):
-            chunk = data[offset : offset + MEMLIST_ENTRY_SIZE]
-            if len(chunk) < MEMLIST_ENTRY_SIZE:
-                break
-            entry = MemListEntry.from_bytes(chunk)
-            entries.append(entry)
-            if entry.is_terminal:
-                break
+        count = len(data) // MEMLIST_ENTRY_SIZE
+        # Scan the type byte of every entry at once for the terminal marker so
+        # that nothing past it gets unpacked.
+        terminal = data[1 : count * MEMLIST_ENTRY_SIZE : MEMLIST_ENTRY_SIZE].find(0xFF)
+        if terminal >= 0:
+            count = terminal + 1
+        entries = list(starmap(MemListEntry, _MEMLIST_STRUCT.iter_unpack(data[: count * MEMLIST_ENTRY_SIZE])))
         return cls(entries)
 
     def save(self, path: Path) -> None:
-        with path.open("wb") as handle:
-            for entry in self.entries:
-                handle.write(entry.to_bytes())
+        buffer = bytearray(len(self.entries) * MEMLIST_ENTRY_SIZE)
+        for index, entry in enumerate(self.entries):
+            _MEMLIST_STRUCT.pack_into(buffer, index * MEMLIST_ENTRY_SIZE, *_entry_fields(entry))
+        path.write_bytes(buffer)
 
     def iter_resources(self) -> Iterator[Tuple[int, MemListEntry]]:
         """Yields ``(resource_id, entry)`` tuples for each non-terminal entry."""
 
-        for index, entry in enumerate(self.entries):
-            yield index, entry
-            if entry.is_terminal:
-                break
+        return iter(self.resources)
 
 
 # ---------------------------------------------------------------------------
@@ -278,7 +373,25 @@ def read_file(path: Path) -> bytes:
     return path.read_bytes()
 
 
-def write_file(path: Path, payload: bytes) -> None:
+def map_file(path: Path) -> Union[mmap.mmap, bytes]:
+    """Maps *path* read-only so slices copy only the bytes they cover.
+
+    Empty files cannot be mapped and are returned as ``b""``.
+    """
+
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return b""
+        if hasattr(os, "posix_fadvise"):
+            # Callers touch most of the file; start reading it in right away.
+            os.posix_fadvise(handle.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapping, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    return mapping
+
+
+def write_file(path: Path, payload: Union[bytes, bytearray, memoryview]) -> None:
     ensure_directory(path.parent)
     path.write_bytes(payload)
 
@@ -295,16 +408,27 @@ def format_label(prefix: str, address: int) -> str:
 
 
 _LABEL_PATTERN = re.compile(r"^(?P<prefix>[a-zA-Z_]+)_(?P<addr>[0-9a-fA-F]{4})$")
+_LABEL_PREFIX_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
 
 
 def resolve_label(value: str, labels: Dict[str, int]) -> int:
     if value in labels:
         return labels[value]
+    # Immediates are by far the most common operands.  They can never match
+    # _LABEL_PATTERN (its prefix cannot start with a digit), so test them first.
+    if value.startswith("0x"):
+        return int(value, 16)
+    # Fast path for generated label names such as ``label_00a0``; equivalent to
+    # _LABEL_PATTERN without going through the regex engine.
+    underscore = len(value) - 5
+    if underscore > 0 and value[underscore] == "_":
+        addr = value[underscore + 1 :]
+        if _HEX_DIGITS.issuperset(addr) and _LABEL_PREFIX_CHARS.issuperset(value[:underscore]):
+            return int(addr, 16)
     match = _LABEL_PATTERN.match(value)
     if match:
         return int(match.group("addr"), 16)
-    if value.startswith("0x"):
-        return int(value, 16)
     return int(value)
 
 
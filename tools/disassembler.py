@@ -11,9 +11,12 @@ from __future__ import annotations
 
 import argparse
 import logging
+import struct
+import sys
+from array import array
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple, Union
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from opcodes import (
     OP_SETI,
@@ -47,7 +50,6 @@ from opcodes import (
     OP_POLY_TYPE1_START,
     OP_POLY_TYPE2_START,
     OP_POLY_MAX,
-    OPCODE_NAMES,
 )
 
 from common import format_label
@@ -59,6 +61,12 @@ from common import format_label
 
 
 class BytecodeStream:
+    """Cursor over a bytecode buffer for callers outside this module.
+
+    The decoders below index the buffer directly instead; method dispatch per
+    byte is measurably slower on the polygon paths.
+    """
+
     def __init__(self, bytecode: bytes, start: int):
         self.bytecode = bytecode
         self.pos = start
@@ -75,27 +83,40 @@ class BytecodeStream:
         return value
 
     def read_u16_be(self) -> int:
-        hi = self.read_u8()
-        lo = self.read_u8()
-        return (hi << 8) | lo
+        if self.pos + 2 > self.end:
+            raise ValueError("unexpected end of bytecode while decoding polygon")
+        value = _U16(self.bytecode, self.pos)[0]
+        self.pos += 2
+        return value
+
+
+# ``unpack_from`` reports an operand cut off by the end of the bytecode as
+# ``struct.error``; the entry points below turn that back into the IndexError
+# that indexing single bytes raises.
+_U16 = struct.Struct(">H").unpack_from
 
 
 def _read_u16(buffer: bytes, offset: int) -> int:
-    return (buffer[offset] << 8) | buffer[offset + 1]
+    try:
+        return _U16(buffer, offset)[0]
+    except struct.error:
+        raise IndexError("unexpected end of bytecode") from None
 
 
-def _decode_poly1(bytecode: bytes, pc: int) -> Tuple[int, str, str]:
-    opcode = bytecode[pc]
-    stream = BytecodeStream(bytecode, pc + 1)
+def _format_raw(raw: bytes) -> str:
+    return "0x" + raw.hex(" ").replace(" ", " 0x")
 
-    raw_bytes = bytearray([opcode])
 
-    offset = stream.read_u16_be()
-    raw_bytes.extend(bytecode[pc + 1 : pc + 3])
+def _decode_poly1(bytecode: bytes, pc: int) -> Tuple[int, str, str]:
+    opcode = bytecode[pc]
 
-    x_param = _poly1_get_x(opcode, stream, raw_bytes)
-    y_param = _poly1_get_y(opcode, stream, raw_bytes)
-    zoom_param, buffer_idx = _poly1_get_zoom_and_buffer(opcode, stream, raw_bytes)
+    try:
+        offset = (bytecode[pc + 1] << 8) | bytecode[pc + 2]
+        x_param, idx = _poly1_get_x(opcode, bytecode, pc + 3)
+        y_param, idx = _poly1_get_y(opcode, bytecode, idx)
+        zoom_param, buffer_idx, idx = _poly1_get_zoom_and_buffer(opcode, bytecode, idx)
+    except IndexError:
+        raise ValueError("unexpected end of bytecode while decoding polygon") from None
 
     comment_parts = [
         f"flags=0x{opcode:02x}",
@@ -106,74 +127,74 @@ def _decode_poly1(bytecode: bytes, pc: int) -> Tuple[int, str, str]:
         f"zoom={zoom_param}",
     ]
 
-    raw_display = " ".join(f"0x{b:02x}" for b in raw_bytes)
-    return len(raw_bytes), raw_display, " ".join(comment_parts)
+    return idx - pc, _format_raw(bytecode[pc:idx]), " ".join(comment_parts)
 
 
-def _poly1_get_x(opcode: int, stream: BytecodeStream, raw_bytes: bytearray) -> str:
-    imm = stream.read_u8()
-    raw_bytes.append(imm)
+def _poly1_get_x(opcode: int, bytecode: bytes, idx: int) -> Tuple[str, int]:
+    imm = bytecode[idx]
 
     if opcode & 0x20:
         if opcode & 0x10:
             value = (imm + 0x100) & 0xFFFF
-            return f"0x{value:04x}"
-        return f"0x{imm:02x}"
+            return f"0x{value:04x}", idx + 1
+        return f"0x{imm:02x}", idx + 1
     else:
         if opcode & 0x10:
-            return f"reg[{imm:02x}]"
-        imm_low = stream.read_u8()
-        raw_bytes.append(imm_low)
-        combined = (imm << 8) | imm_low
-        return f"0x{combined:04x}"
+            return f"reg[{imm:02x}]", idx + 1
+        combined = (imm << 8) | bytecode[idx + 1]
+        return f"0x{combined:04x}", idx + 2
 
 
-def _poly1_get_y(opcode: int, stream: BytecodeStream, raw_bytes: bytearray) -> str:
-    imm = stream.read_u8()
-    raw_bytes.append(imm)
+def _poly1_get_y(opcode: int, bytecode: bytes, idx: int) -> Tuple[str, int]:
+    imm = bytecode[idx]
 
     if opcode & 0x08:
         if opcode & 0x04:
-            return f"0x{imm:02x}"
-        return f"0x{imm:02x}"
+            return f"0x{imm:02x}", idx + 1
+        return f"0x{imm:02x}", idx + 1
     else:
         if opcode & 0x04:
-            return f"reg[{imm:02x}]"
-        imm_low = stream.read_u8()
-        raw_bytes.append(imm_low)
-        combined = (imm << 8) | imm_low
-        return f"0x{combined:04x}"
+            return f"reg[{imm:02x}]", idx + 1
+        combined = (imm << 8) | bytecode[idx + 1]
+        return f"0x{combined:04x}", idx + 2
 
 
-def _poly1_get_zoom_and_buffer(opcode: int, stream: BytecodeStream, raw_bytes: bytearray) -> Tuple[str, int]:
+def _poly1_get_zoom_and_buffer(opcode: int, bytecode: bytes, idx: int) -> Tuple[str, int, int]:
     buffer_idx = 1
 
     if opcode & 0x02:
         if opcode & 0x01:
             buffer_idx = 2
-            return "0x0040", buffer_idx
-        zoom = stream.read_u8()
-        raw_bytes.append(zoom)
-        return f"0x{zoom:02x}", buffer_idx
+            return "0x0040", buffer_idx, idx
+        return f"0x{bytecode[idx]:02x}", buffer_idx, idx + 1
     else:
         if opcode & 0x01:
-            reg_idx = stream.read_u8()
-            raw_bytes.append(reg_idx)
-            return f"reg[{reg_idx:02x}]", buffer_idx
-        return "0x0040", buffer_idx
+            return f"reg[{bytecode[idx]:02x}]", buffer_idx, idx + 1
+        return "0x0040", buffer_idx, idx
 
 
-def _decode_poly2(bytecode: bytes, pc: int) -> Tuple[int, str, str]:
-    opcode = bytecode[pc]
-    stream = BytecodeStream(bytecode, pc + 1)
-    raw_bytes = bytearray([opcode]) 
+def _poly1_operand_bytes(opcode: int) -> int:
+    x_bytes = 1 if opcode & 0x30 else 2
+    y_bytes = 1 if opcode & 0x0C else 2
+    zoom_bytes = (opcode ^ (opcode >> 1)) & 0x01
+    return x_bytes + y_bytes + zoom_bytes
+
+
+# Total POLY1 instruction length (opcode, 16-bit offset and operands),
+# indexed by ``opcode - OP_POLY_TYPE1_START``.
+_POLY1_LENGTHS = bytes(3 + _poly1_operand_bytes(opcode) for opcode in range(OP_POLY_TYPE1_START, OP_POLY_TYPE2_START))
+
 
-    lsb = stream.read_u8()
-    raw_bytes.append(lsb)
-    x_val = stream.read_u8()
-    raw_bytes.append(x_val)
-    y_val = stream.read_u8()
-    raw_bytes.append(y_val)
+def _poly1_length(bytecode: bytes, pc: int) -> int:
+    """Returns the POLY1 instruction length without decoding its operands."""
+
+    return _POLY1_LENGTHS[bytecode[pc] - OP_POLY_TYPE1_START]
+
+
+def _decode_poly2(bytecode: bytes, pc: int) -> Tuple[int, str, str]:
+    if pc + 4 > len(bytecode):
+        raise ValueError("unexpected end of bytecode while decoding polygon")
+    opcode, lsb, x_val, y_val = bytecode[pc : pc + 4]
 
     offset = ((opcode << 8) | lsb) * 2
 
@@ -182,8 +203,7 @@ def _decode_poly2(bytecode: bytes, pc: int) -> Tuple[int, str, str]:
         f"x=0x{x_val:02x} y=0x{y_val:02x} buf=1 zoom=0x0040"
     )
 
-    raw_display = " ".join(f"0x{b:02x}" for b in raw_bytes)
-    return len(raw_bytes), raw_display, comment
+    return 4, _format_raw(bytecode[pc : pc + 4]), comment
 
 
 @dataclass
@@ -224,8 +244,49 @@ INSTRUCTION_SET: Dict[int, InstructionDef] = {
 
 CONDITION_CODES = ["eq", "ne", "gt", "ge", "lt", "le"]
 
+# Instruction length indexed by opcode.  Unknown opcodes (and the polygon
+# range, which is decoded separately) default to a single byte.
+_INSTRUCTION_LENGTHS = bytearray(1 for _ in range(256))
+for _opcode, _definition in INSTRUCTION_SET.items():
+    _INSTRUCTION_LENGTHS[_opcode] = _definition.length
+del _opcode, _definition
+
+# Opcode classification, so both passes dispatch on a single table read
+# instead of chained range comparisons.
+_KIND_FIXED = 0  # fixed length, no branch target
+_KIND_BRANCH = 1  # fixed length with a branch target (see _BRANCH_TARGETS)
+_KIND_CJMP = 2
+_KIND_POLY1 = 3
+_KIND_POLY2 = 4
+_KIND_INVALID = 5
+
+_OPKIND = bytearray(_KIND_INVALID for _ in range(256))
+for _opcode in INSTRUCTION_SET:
+    _OPKIND[_opcode] = _KIND_FIXED
+_OPKIND[OP_CALL] = _OPKIND[OP_JUMP] = _OPKIND[OP_START] = _OPKIND[OP_DBRA] = _KIND_BRANCH
+_OPKIND[OP_CJMP] = _KIND_CJMP
+_OPKIND[OP_POLY_TYPE1_START:OP_POLY_TYPE2_START] = bytes([_KIND_POLY1]) * (OP_POLY_TYPE2_START - OP_POLY_TYPE1_START)
+_OPKIND[OP_POLY_TYPE2_START : OP_POLY_MAX + 1] = bytes([_KIND_POLY2]) * (OP_POLY_MAX + 1 - OP_POLY_TYPE2_START)
+del _opcode
+
+# ``(length, target offset, label prefix)`` for the fixed-length branches.
+_BRANCH_TARGETS: Dict[int, Tuple[int, int, str]] = {
+    OP_CALL: (3, 1, "func"),
+    OP_JUMP: (3, 1, "label"),
+    OP_START: (4, 2, "thread"),
+    OP_DBRA: (4, 2, "label"),
+}
 
-def _collect_labels(bytecode: bytes) -> Dict[int, str]:
+
+def _parse_pass(bytecode: bytes) -> Tuple[array, Dict[int, str]]:
+    """Walks the instruction stream once, without formatting anything.
+
+    Returns the start offset of every instruction alongside the generated
+    labels, so the formatting pass in ``_decode`` never has to work out
+    instruction boundaries again.
+    """
+
+    starts = array("I")
     labels: Dict[int, str] = {}
     pc = 0
     size = len(bytecode)
@@ -234,220 +295,316 @@ def _collect_labels(bytecode: bytes) -> Dict[int, str]:
         if addr not in labels:
             labels[addr] = format_label(prefix, addr)
 
-    def skip_polygon(current_pc: int) -> int:
-        opcode = bytecode[current_pc]
-        if OP_POLY_TYPE1_START <= opcode < OP_POLY_TYPE2_START:
-            length, *_ = _decode_poly1(bytecode, current_pc)
-            return length
-        if OP_POLY_TYPE2_START <= opcode <= OP_POLY_MAX:
-            length, *_ = _decode_poly2(bytecode, current_pc)
-            return length
-        return 1
+    kinds = _OPKIND
+    lengths = _INSTRUCTION_LENGTHS
 
     while pc < size:
+        starts.append(pc)
         opcode = bytecode[pc]
-        if opcode == OP_CALL:
-            target = _read_u16(bytecode, pc + 1)
-            assign_label(target, "func")
-            pc += 3
-        elif opcode == OP_JUMP:
-            target = _read_u16(bytecode, pc + 1)
-            assign_label(target, "label")
-            pc += 3
-        elif opcode == OP_START:
-            target = _read_u16(bytecode, pc + 2)
-            assign_label(target, "thread")
+        kind = kinds[opcode]
+        if kind == _KIND_FIXED:
+            pc += lengths[opcode]
+        elif kind == _KIND_POLY1:
+            # Polygon operands carry no branch targets, so only the length is
+            # needed here; a truncated polygon is reported by ``_decode``.
+            pc += _poly1_length(bytecode, pc)
+        elif kind == _KIND_POLY2:
             pc += 4
-        elif opcode == OP_DBRA:
-            target = _read_u16(bytecode, pc + 2)
-            assign_label(target, "label")
-            pc += 4
-        elif opcode == OP_CJMP:  # CJMP variants
-            variant = bytecode[pc + 1]
-            if variant & 0x80:
-                target = _read_u16(bytecode, pc + 4)
-                length = 6
-            elif variant & 0x40:
-                target = _read_u16(bytecode, pc + 5)
-                length = 7
-            else:
-                target = _read_u16(bytecode, pc + 4)
-                length = 6
-            assign_label(target, "label")
+        elif kind == _KIND_BRANCH:
+            length, target_offset, prefix = _BRANCH_TARGETS[opcode]
+            assign_label(_U16(bytecode, pc + target_offset)[0], prefix)
+            pc += length
+        elif kind == _KIND_CJMP:
+            length, target_offset, _ = _CJMP_VARIANTS[bytecode[pc + 1] >> 6]
+            assign_label(_U16(bytecode, pc + target_offset)[0], "label")
             pc += length
         else:
-            definition = INSTRUCTION_SET.get(opcode)
-            if definition:
-                pc += definition.length
-            elif opcode >= OP_POLY_BEGIN:
-                pc += skip_polygon(pc)
-            else:
-                pc += 1
-    return labels
+            pc += 1
+    return starts, labels
+
+
+def _collect_labels(bytecode: bytes) -> Dict[int, str]:
+    try:
+        return _parse_pass(bytecode)[1]
+    except struct.error:
+        raise IndexError("unexpected end of bytecode") from None
 
 
 def _format_operand(value: int) -> str:
     return f"0x{value:04x}"
 
 
-def _decode(bytecode: bytes, labels: Dict[int, str]) -> List[str]:
+# ---------------------------------------------------------------------------
+# Per-opcode formatters
+# ---------------------------------------------------------------------------
+
+
+def _fmt_seti(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+    return "    SETI [$%02x], 0x%04x" % (bytecode[pc + 1], _U16(bytecode, pc + 2)[0])
+
+
+def _fmt_reg_reg(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    template = f"    {name} [$%02x], [$%02x]"
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        return template % (bytecode[pc + 1], bytecode[pc + 2])
+
+    return formatter
+
+
+def _fmt_reg_imm(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    template = f"    {name} [$%02x], 0x%04x"
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        return template % (bytecode[pc + 1], _U16(bytecode, pc + 2)[0])
+
+    return formatter
+
+
+def _fmt_branch(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    prefix = f"    {name} "
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        addr = _U16(bytecode, pc + 1)[0]
+        return prefix + labels.get(addr, _format_operand(addr))
+
+    return formatter
+
+
+def _fmt_bare(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    line = f"    {name}"
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        return line
+
+    return formatter
+
+
+def _fmt_dbra(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+    addr = _U16(bytecode, pc + 2)[0]
+    return "    DBRA [$%02x], %s" % (bytecode[pc + 1], labels.get(addr, _format_operand(addr)))
+
+
+def _fmt_start(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+    addr = _U16(bytecode, pc + 2)[0]
+    return "    START 0x%02x, %s" % (bytecode[pc + 1], labels.get(addr, _format_operand(addr)))
+
+
+def _fmt_reset(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+    return "    RESET 0x%02x, 0x%02x, 0x%02x" % (bytecode[pc + 1], bytecode[pc + 2], bytecode[pc + 3])
+
+
+def _fmt_byte(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    template = f"    {name} 0x%02x"
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        return template % bytecode[pc + 1]
+
+    return formatter
+
+
+def _fmt_byte_byte(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    template = f"    {name} 0x%02x, 0x%02x"
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        return template % (bytecode[pc + 1], bytecode[pc + 2])
+
+    return formatter
+
+
+def _fmt_word_3bytes(name: str) -> Callable[[bytes, int, Dict[int, str]], str]:
+    template = f"    {name} 0x%04x, 0x%02x, 0x%02x, 0x%02x"
+
+    def formatter(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+        return template % (
+            _U16(bytecode, pc + 1)[0],
+            bytecode[pc + 3],
+            bytecode[pc + 4],
+            bytecode[pc + 5],
+        )
+
+    return formatter
+
+
+def _fmt_music(bytecode: bytes, pc: int, labels: Dict[int, str]) -> str:
+    return "    MUSIC 0x%02x, 0x%04x, 0x%04x, 0x%02x" % (
+        bytecode[pc + 1],
+        _U16(bytecode, pc + 2)[0],
+        _U16(bytecode, pc + 4)[0],
+        bytecode[pc + 6],
+    )
+
+
+def _fmt_cjmp_imm8(bytecode: bytes, pc: int, cond: str, labels: Dict[int, str]) -> str:
+    addr = _U16(bytecode, pc + 4)[0]
+    return "    CJMP %s, [$%02x], 0x%02x, %s" % (
+        cond,
+        bytecode[pc + 2],
+        bytecode[pc + 3],
+        labels.get(addr, _format_operand(addr)),
+    )
+
+
+def _fmt_cjmp_imm16(bytecode: bytes, pc: int, cond: str, labels: Dict[int, str]) -> str:
+    addr = _U16(bytecode, pc + 5)[0]
+    return "    CJMP %s, [$%02x], 0x%04x, %s" % (
+        cond,
+        bytecode[pc + 2],
+        _U16(bytecode, pc + 3)[0],
+        labels.get(addr, _format_operand(addr)),
+    )
+
+
+def _fmt_cjmp_regreg(bytecode: bytes, pc: int, cond: str, labels: Dict[int, str]) -> str:
+    addr = _U16(bytecode, pc + 4)[0]
+    return "    CJMP %s, [$%02x], [$%02x], %s" % (
+        cond,
+        bytecode[pc + 2],
+        bytecode[pc + 3],
+        labels.get(addr, _format_operand(addr)),
+    )
+
+
+# CJMP layouts indexed by the top two bits of the variant byte: bit 7 selects
+# a register operand, otherwise bit 6 selects a 16-bit immediate.  Each entry
+# is ``(length, target offset, formatter)``.
+_CJMP_VARIANTS: Tuple[Tuple[int, int, Callable[[bytes, int, str, Dict[int, str]], str]], ...] = (
+    (6, 4, _fmt_cjmp_imm8),
+    (7, 5, _fmt_cjmp_imm16),
+    (6, 4, _fmt_cjmp_regreg),
+    (6, 4, _fmt_cjmp_regreg),
+)
+
+
+# Formatters for every fixed-length instruction.  CJMP and the polygon
+# opcodes are variable length and handled directly in ``_decode``.
+_DISPATCH: Dict[int, Callable[[bytes, int, Dict[int, str]], str]] = {
+    OP_SETI: _fmt_seti,
+    OP_SETR: _fmt_reg_reg("SETR"),
+    OP_ADDR: _fmt_reg_reg("ADDR"),
+    OP_ADDI: _fmt_reg_imm("ADDI"),
+    OP_CALL: _fmt_branch("CALL"),
+    OP_RET: _fmt_bare("RET"),
+    OP_YIELD: _fmt_bare("YIELD"),
+    OP_JUMP: _fmt_branch("JUMP"),
+    OP_START: _fmt_start,
+    OP_DBRA: _fmt_dbra,
+    OP_FADE: _fmt_branch("FADE"),
+    OP_RESET: _fmt_reset,
+    OP_PAGE: _fmt_byte("PAGE"),
+    OP_FILL: _fmt_byte_byte("FILL"),
+    OP_COPY: _fmt_byte_byte("COPY"),
+    OP_SHOW: _fmt_byte("SHOW"),
+    OP_HALT: _fmt_bare("HALT"),
+    OP_PRINT: _fmt_word_3bytes("PRINT"),
+    OP_SUBR: _fmt_reg_reg("SUBR"),
+    OP_ANDI: _fmt_reg_imm("ANDI"),
+    OP_IORI: _fmt_reg_imm("IORI"),
+    OP_LSLI: _fmt_reg_imm("LSLI"),
+    OP_LSRI: _fmt_reg_imm("LSRI"),
+    OP_SOUND: _fmt_word_3bytes("SOUND"),
+    OP_LOAD: _fmt_branch("LOAD"),
+    OP_MUSIC: _fmt_music,
+}
+
+
+def _decode(bytecode: bytes, labels: Dict[int, str], starts: Iterable[int]) -> List[str]:
     lines: List[str] = []
-    pc = 0
-    size = len(bytecode)
+    append = lines.append
+    kinds = _OPKIND
+    dispatch = _DISPATCH
 
-    while pc < size:
+    for pc in starts:
         if pc in labels:
-            lines.append(f"{labels[pc]}:")
+            append(f"{labels[pc]}:")
 
         opcode = bytecode[pc]
-        mnemonic = OPCODE_NAMES.get(opcode)
-        definition = INSTRUCTION_SET.get(opcode)
+        kind = kinds[opcode]
+
+        if kind <= _KIND_BRANCH:
+            append(dispatch[opcode](bytecode, pc, labels))
+            continue
 
-        if definition is None and opcode == OP_CJMP:
+        if kind == _KIND_CJMP:
             variant = bytecode[pc + 1]
             cond_idx = variant & 0x07
             if cond_idx < len(CONDITION_CODES) and (variant & ~0xC7) == 0:
                 cond = CONDITION_CODES[cond_idx]
             else:
                 cond = f"0x{variant:02x}"
-            reg1 = bytecode[pc + 2]
-            if variant & 0x80:
-                reg2 = bytecode[pc + 3]
-                addr = _read_u16(bytecode, pc + 4)
-                target = labels.get(addr, _format_operand(addr))
-                lines.append(f"    CJMP {cond}, [$%02x], [$%02x], {target}" % (reg1, reg2))
-                pc += 6
-            elif variant & 0x40:
-                imm = _read_u16(bytecode, pc + 3)
-                addr = _read_u16(bytecode, pc + 5)
-                target = labels.get(addr, _format_operand(addr))
-                lines.append("    CJMP %s, [$%02x], 0x%04x, %s" % (cond, reg1, imm, target))
-                pc += 7
-            else:
-                imm = bytecode[pc + 3]
-                addr = _read_u16(bytecode, pc + 4)
-                target = labels.get(addr, _format_operand(addr))
-                lines.append("    CJMP %s, [$%02x], 0x%02x, %s" % (cond, reg1, imm, target))
-                pc += 6
-            continue
-
-        if definition is None and opcode >= OP_POLY_BEGIN:
-            if OP_POLY_TYPE1_START <= opcode < OP_POLY_TYPE2_START:
-                length, raw_display, comment = _decode_poly1(bytecode, pc)
-            elif OP_POLY_TYPE2_START <= opcode <= OP_POLY_MAX:
-                length, raw_display, comment = _decode_poly2(bytecode, pc)
-            else:
-                raw_display = f"0x{opcode:02x}"
-                length = 1
-                comment = ""
-            if comment:
-                lines.append(f"    POLYRAW {raw_display} ; {comment}")
-            else:
-                lines.append(f"    POLYRAW {raw_display}")
-            pc += length
+            append(_CJMP_VARIANTS[variant >> 6][2](bytecode, pc, cond, labels))
             continue
 
-        if definition is None:
-            lines.append(f"    DB 0x{opcode:02x}")
-            pc += 1
-            continue
-
-        name = definition.name
-        length = definition.length
-
-        if name == "SETI":
-            reg = bytecode[pc + 1]
-            imm = _read_u16(bytecode, pc + 2)
-            lines.append("    SETI [$%02x], 0x%04x" % (reg, imm))
-        elif name in {"SETR", "ADDR", "SUBR"}:
-            reg1 = bytecode[pc + 1]
-            reg2 = bytecode[pc + 2]
-            lines.append(f"    {name} [$%02x], [$%02x]" % (reg1, reg2))
-        elif name in {"ADDI", "ANDI", "IORI", "LSLI", "LSRI"}:
-            reg = bytecode[pc + 1]
-            imm = _read_u16(bytecode, pc + 2)
-            lines.append("    %s [$%02x], 0x%04x" % (name, reg, imm))
-        elif name in {"CALL", "JUMP", "LOAD", "FADE"}:
-            addr = _read_u16(bytecode, pc + 1)
-            target = labels.get(addr, _format_operand(addr))
-            lines.append(f"    {name} {target}")
-        elif name == "DBRA":
-            reg = bytecode[pc + 1]
-            addr = _read_u16(bytecode, pc + 2)
-            target = labels.get(addr, _format_operand(addr))
-            lines.append("    DBRA [$%02x], %s" % (reg, target))
-        elif name == "START":
-            thread_id = bytecode[pc + 1]
-            addr = _read_u16(bytecode, pc + 2)
-            target = labels.get(addr, _format_operand(addr))
-            lines.append(f"    START 0x{thread_id:02x}, {target}")
-        elif name == "RESET":
-            begin = bytecode[pc + 1]
-            end = bytecode[pc + 2]
-            state = bytecode[pc + 3]
-            lines.append(f"    RESET 0x{begin:02x}, 0x{end:02x}, 0x{state:02x}")
-        elif name == "PAGE":
-            page = bytecode[pc + 1]
-            lines.append(f"    PAGE 0x{page:02x}")
-        elif name == "FILL":
-            dst = bytecode[pc + 1]
-            color = bytecode[pc + 2]
-            lines.append(f"    FILL 0x{dst:02x}, 0x{color:02x}")
-        elif name == "COPY":
-            dst = bytecode[pc + 1]
-            src = bytecode[pc + 2]
-            lines.append(f"    COPY 0x{dst:02x}, 0x{src:02x}")
-        elif name == "SHOW":
-            lines.append(f"    SHOW 0x{bytecode[pc + 1]:02x}")
-        elif name == "PRINT":
-            string = _read_u16(bytecode, pc + 1)
-            x = bytecode[pc + 3]
-            y = bytecode[pc + 4]
-            color = bytecode[pc + 5]
-            lines.append(f"    PRINT 0x{string:04x}, 0x{x:02x}, 0x{y:02x}, 0x{color:02x}")
-        elif name == "SOUND":
-            sid = _read_u16(bytecode, pc + 1)
-            freq = bytecode[pc + 3]
-            vol = bytecode[pc + 4]
-            channel = bytecode[pc + 5]
-            lines.append(f"    SOUND 0x{sid:04x}, 0x{freq:02x}, 0x{vol:02x}, 0x{channel:02x}")
-        elif name == "MUSIC":
-            index = bytecode[pc + 1]
-            mid = _read_u16(bytecode, pc + 2)
-            delay = _read_u16(bytecode, pc + 4)
-            pos = bytecode[pc + 6]
-            lines.append(f"    MUSIC 0x{index:02x}, 0x{mid:04x}, 0x{delay:04x}, 0x{pos:02x}")
+        if kind == _KIND_POLY1:
+            _, raw_display, comment = _decode_poly1(bytecode, pc)
+            append(f"    POLYRAW {raw_display} ; {comment}")
+        elif kind == _KIND_POLY2:
+            _, raw_display, comment = _decode_poly2(bytecode, pc)
+            append(f"    POLYRAW {raw_display} ; {comment}")
+        elif opcode >= OP_POLY_BEGIN:
+            append(f"    POLYRAW 0x{opcode:02x}")
         else:
-            lines.append(f"    {name}")
-
-        pc += length
+            append(f"    DB 0x{opcode:02x}")
 
     return lines
 
 
 def disassemble(bytecode: bytes) -> List[str]:
-    labels = _collect_labels(bytecode)
-    return _decode(bytecode, labels)
+    try:
+        starts, labels = _parse_pass(bytecode)
+        return _decode(bytecode, labels, starts)
+    except struct.error:
+        raise IndexError("unexpected end of bytecode") from None
+
+
+def _write_listing(path: Path, lines: List[str]) -> None:
+    with path.open("w", encoding="utf-8") as handle:
+        handle.writelines(("\n".join(lines), "\n"))
+
+
+def _disassemble_file(path: Path) -> Path:
+    """Batch-mode worker: disassembles *path* into a sibling ``.asm`` file."""
+
+    target = path.with_suffix(".asm")
+    _write_listing(target, disassemble(path.read_bytes()))
+    return target
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description="Disassemble Another World bytecode")
-    parser.add_argument("input", type=Path, help="Path to bytecode binary")
+    parser.add_argument(
+        "inputs",
+        type=Path,
+        nargs="+",
+        metavar="input",
+        help="Path to bytecode binary; pass several to disassemble them in parallel, each into a sibling .asm file",
+    )
     parser.add_argument("--output", type=Path, help="Where to write assembly output (defaults to stdout)")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(levelname)s: %(message)s")
 
-    bytecode = args.input.read_bytes()
-    lines = disassemble(bytecode)
-    text = "\n".join(lines) + "\n"
+    if len(args.inputs) > 1:
+        if args.output:
+            parser.error("--output cannot be combined with multiple inputs")
+        # Disassembly is CPU-bound pure Python, so spread the files over
+        # processes rather than threads.  Imported here because pulling in
+        # multiprocessing costs a third of the single-file start-up time.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor() as pool:
+            for target in pool.map(_disassemble_file, args.inputs, chunksize=4):
+                logging.info("Wrote disassembly to %s", target)
+        return 0
+
+    lines = disassemble(args.inputs[0].read_bytes())
 
     if args.output:
-        args.output.write_text(text, encoding="utf-8")
+        _write_listing(args.output, lines)
         logging.info("Wrote disassembly to %s", args.output)
     else:
-        print(text)
+        sys.stdout.writelines(("\n".join(lines), "\n"))
     return 0
 
 
@@ -18,89 +18,165 @@ from __future__ import annotations
 
 import argparse
 import logging
+import mmap
+from array import array
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 from common import (
     MEMLIST_ENTRY_SIZE,
     MemList,
-    MemListEntry,
     bytekiller_compress,
+    clone_entry,
     ensure_directory,
+    map_file,
     read_file,
     write_file,
 )
 
+_log = logging.getLogger(__name__)
 
-def _load_original_payloads(data_dir: Path) -> Dict[Tuple[int, int], bytes]:
-    """Load the original compressed payloads keyed by ``(bank_id, offset)``."""
 
-    memlist = MemList.load(data_dir / "MEMLIST.BIN")
-    cache: Dict[int, bytes] = {}
-    payloads: Dict[Tuple[int, int], bytes] = {}
+def _collect_original_spans(memlist: MemList, modified: Dict[int, Path]) -> Dict[int, Tuple[array, array]]:
+    """Group the payload spans of unmodified resources by bank.
+
+    Spans are returned as parallel ``(offsets, sizes)`` arrays; banks that only
+    hold modified resources are left out, so they never need to be read.
+    """
 
-    for _, entry in memlist.iter_resources():
+    spans: Dict[int, Tuple[array, array]] = {}
+    for resource_id, entry in memlist.iter_resources():
+        if entry.is_terminal:
+            break
+        if resource_id in modified:
+            continue
+        bank_spans = spans.get(entry.bank_id)
+        if bank_spans is None:
+            bank_spans = spans[entry.bank_id] = (array("I"), array("I"))
+        bank_spans[0].append(entry.bank_offset)
+        bank_spans[1].append(entry.packed_size)
+    return spans
+
+
+def _coalesce_spans(offsets: array, sizes: array) -> List[Tuple[int, int]]:
+    """Merge touching or overlapping spans into ``(start, end)`` runs sorted by offset."""
+
+    runs: List[Tuple[int, int]] = []
+    run_start = run_end = -1
+    for offset, size in sorted(zip(offsets, sizes)):
+        if offset > run_end:
+            if run_end > run_start:
+                runs.append((run_start, run_end))
+            run_start = offset
+        run_end = max(run_end, offset + size)
+    if run_end > run_start:
+        runs.append((run_start, run_end))
+    return runs
+
+
+def _index_resource_files(resources_dir: Path) -> Dict[str, List[Path]]:
+    """Group the ``{id:02x}_*.bin`` files of *resources_dir* by their id prefix."""
+
+    candidates: Dict[str, List[Path]] = {}
+    if not resources_dir.is_dir():
+        # Nothing to patch in; rebuild the original data unchanged.
+        return candidates
+    for path in resources_dir.iterdir():
+        prefix, separator, _ = path.name.partition("_")
+        if separator and path.name.endswith(".bin"):
+            candidates.setdefault(prefix, []).append(path)
+    return candidates
+
+
+def _validate_modifications(memlist: MemList, candidates: Dict[str, List[Path]]) -> Dict[int, Path]:
+    """Resolve the modified file of every resource before any data is rebuilt.
+
+    Ambiguous candidates and resources that would need recompressing are
+    rejected here, so a doomed run fails before touching the BANK files.
+    """
+
+    modified: Dict[int, Path] = {}
+    for resource_id, entry in memlist.iter_resources():
         if entry.is_terminal:
             break
-        bank_key = entry.bank_id
-        bank_blob = cache.setdefault(bank_key, (data_dir / f"BANK{bank_key:02X}").read_bytes())
-        payload = bank_blob[entry.bank_offset : entry.bank_offset + entry.packed_size]
-        payloads[(entry.bank_id, entry.bank_offset)] = payload
 
-    return payloads
+        matches = candidates.get(f"{resource_id:02x}")
+        if not matches:
+            continue
+
+        if len(matches) > 1:
+            raise RuntimeError(f"multiple candidate files for resource {resource_id:02x}")
+
+        if entry.packed_size != entry.unpacked_size:
+            # Attempt to compress; currently unsupported.
+            _log.error("Resource %02x was compressed originally; compression not supported yet", resource_id)
+            bytekiller_compress(read_file(matches[0]))  # This will raise NotImplementedError.
+
+        modified[resource_id] = matches[0]
+    return modified
 
 
 def _rebuild(data_dir: Path, resources_dir: Path, output_dir: Path) -> None:
-    original_payloads = _load_original_payloads(data_dir)
     memlist = MemList.load(data_dir / "MEMLIST.BIN")
+    modified = _validate_modifications(memlist, _index_resource_files(resources_dir))
+    original_spans = _collect_original_spans(memlist, modified)
+    # Modified payloads go after the original data kept in their bank so they
+    # never overlap the spans copied over from the original BANK file; the
+    # sizes grow as payloads are placed and give the final length of every bank.
+    bank_sizes = {
+        bank_id: max(offset + size for offset, size in zip(offsets, sizes))
+        for bank_id, (offsets, sizes) in original_spans.items()
+    }
 
     new_entries = []
-    bank_buffers: Dict[int, bytearray] = {}
-    bank_offsets: Dict[int, int] = {}
+    patches: Dict[int, List[Tuple[int, bytes]]] = {}
 
     for resource_id, entry in memlist.iter_resources():
-        new_entry = MemListEntry(**{field.name: getattr(entry, field.name) for field in MemListEntry.__dataclass_fields__.values()})
+        new_entry = clone_entry(entry)
         if entry.is_terminal:
             new_entries.append(new_entry)
             break
 
-        resource_name = resources_dir / f"{resource_id:02x}_"
-        matches = list(resource_name.parent.glob(f"{resource_id:02x}_*.bin"))
-        if not matches:
-            logging.debug("Resource %02x unchanged; keeping original payload", resource_id)
+        resource_path = modified.get(resource_id)
+        if resource_path is None:
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug("Resource %02x unchanged; keeping original payload", resource_id)
             new_entries.append(new_entry)
             continue
 
-        if len(matches) > 1:
-            raise RuntimeError(f"multiple candidate files for resource {resource_id:02x}")
-
-        resource_path = matches[0]
         payload = read_file(resource_path)
         new_entry.unpacked_size = len(payload)
 
-        if entry.packed_size != entry.unpacked_size:
-            # Attempt to compress; currently unsupported.
-            logging.error("Resource %02x was compressed originally; compression not supported yet", resource_id)
-            bytekiller_compress(payload)  # This will raise NotImplementedError.
-
         bank_id = entry.bank_id
-        bank_buf = bank_buffers.setdefault(bank_id, bytearray())
-        offset = len(bank_buf)
-        bank_buf.extend(payload)
+        offset = bank_sizes.get(bank_id, 0)
+        bank_sizes[bank_id] = offset + len(payload)
+        patches.setdefault(bank_id, []).append((offset, payload))
         new_entry.bank_offset = offset
         new_entry.packed_size = len(payload)
-        bank_offsets[resource_id] = offset
         new_entries.append(new_entry)
 
-    # Reconstruct BANK files with patched payloads (unchanged entries fall back
-    # to original data).
-    for (bank_id, offset), payload in original_payloads.items():
-        bank_buf = bank_buffers.setdefault(bank_id, bytearray())
-        # Ensure capacity.
-        end = offset + len(payload)
-        if len(bank_buf) < end:
-            bank_buf.extend(b"\x00" * (end - len(bank_buf)))
-        bank_buf[offset:end] = payload
+    # Reconstruct BANK files in buffers allocated at their final size: the
+    # unmodified spans are copied straight from the mapped source bank,
+    # followed by the patched payloads.
+    bank_buffers: Dict[int, bytearray] = {}
+    for bank_id, bank_size in bank_sizes.items():
+        bank_buf = bank_buffers[bank_id] = bytearray(bank_size)
+        if bank_id in original_spans:
+            runs = _coalesce_spans(*original_spans[bank_id])
+            source = map_file(data_dir / f"BANK{bank_id:02X}")
+            try:
+                if runs and len(source) < runs[-1][1]:
+                    raise RuntimeError(f"BANK{bank_id:02X} is shorter than the resources MEMLIST places in it")
+                # Copy through views: one memcpy per run, and a size mismatch
+                # can never resize the preallocated buffer.
+                with memoryview(source) as source_view, memoryview(bank_buf) as target_view:
+                    for start, end in runs:
+                        target_view[start:end] = source_view[start:end]
+            finally:
+                if isinstance(source, mmap.mmap):
+                    source.close()
+        for offset, payload in patches.get(bank_id, ()):
+            bank_buf[offset : offset + len(payload)] = payload
 
     # Write output files.
     ensure_directory(output_dir)
@@ -108,7 +184,7 @@ def _rebuild(data_dir: Path, resources_dir: Path, output_dir: Path) -> None:
     MemList(new_entries).save(output_dir / "MEMLIST.BIN")
 
     for bank_id, buffer in bank_buffers.items():
-        write_file(output_dir / f"BANK{bank_id:02X}", bytes(buffer))
+        write_file(output_dir / f"BANK{bank_id:02X}", buffer)
 
 
 def main() -> int:
@@ -123,7 +199,7 @@ def main() -> int:
 
     _rebuild(args.data_dir, args.resources, args.output)
 
-    logging.info("Rebuilt resources written to %s", args.output)
+    _log.info("Rebuilt resources written to %s", args.output)
     return 0
 
 
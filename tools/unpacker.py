@@ -17,17 +17,25 @@ from __future__ import annotations
 
 import argparse
 import logging
+import mmap
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Union
 
 from common import (
     ByteKillerError,
     MemList,
+    MemListEntry,
     bytekiller_decompress,
     ensure_directory,
+    map_file,
     write_file,
 )
 
+_log = logging.getLogger(__name__)
+
+# BANK files are memory-mapped; only the slice of each resource gets copied.
+BankData = Union[mmap.mmap, bytes]
+
 
 _RESOURCE_TYPE_NAMES = {
     0x00: "sound",
@@ -41,46 +49,73 @@ _RESOURCE_TYPE_NAMES = {
 }
 
 
-def _load_bank(path: Path) -> bytes:
-    return path.read_bytes()
+def _load_bank(path: Path) -> BankData:
+    return map_file(path)
 
 
 def _extract_resources(data_dir: Path, output_dir: Path) -> None:
     memlist = MemList.load(data_dir / "MEMLIST.BIN")
 
-    bank_cache: Dict[int, bytes] = {}
-
+    bank_cache: Dict[int, BankData] = {}
+    try:
+        _extract_from_banks(memlist, data_dir, output_dir, bank_cache)
+    finally:
+        for bank_data in bank_cache.values():
+            if isinstance(bank_data, mmap.mmap):
+                try:
+                    bank_data.close()
+                except BufferError:
+                    # A failed write may still hold a view of the mapping in
+                    # its traceback; leave the mapping to the garbage
+                    # collector rather than hide that error.
+                    pass
+
+
+def _extract_from_banks(memlist: MemList, data_dir: Path, output_dir: Path, bank_cache: Dict[int, BankData]) -> None:
     for resource_id, entry in memlist.iter_resources():
         if entry.is_terminal:
-            logging.debug("Reached terminal resource entry at %02x", resource_id)
+            _log.debug("Reached terminal resource entry at %02x", resource_id)
             break
 
         resource_type_name = _RESOURCE_TYPE_NAMES.get(entry.type, f"type{entry.type:02x}")
-        target_name = f"{resource_id:02x}_{resource_type_name}.bin"
-        target_path = output_dir / target_name
-
-        bank_path = data_dir / f"BANK{entry.bank_id:02X}"
-        bank_data = bank_cache.setdefault(entry.bank_id, _load_bank(bank_path))
-
-        compressed = bank_data[entry.bank_offset : entry.bank_offset + entry.packed_size]
-
-        if entry.packed_size == entry.unpacked_size:
-            logging.debug("%s -> copied raw bytes (%d bytes)", target_name, entry.unpacked_size)
-            payload = compressed
-        else:
-            try:
-                payload = bytekiller_decompress(compressed, entry.unpacked_size)
-                logging.debug(
-                    "%s -> decompressed %d -> %d bytes",
-                    target_name,
-                    entry.packed_size,
-                    entry.unpacked_size,
-                )
-            except ByteKillerError as exc:
-                logging.error("Failed to decompress resource %02x: %s", resource_id, exc)
-                raise
-
-        write_file(target_path, payload)
+        target_path = output_dir / f"{resource_id:02x}_{resource_type_name}.bin"
+
+        bank_data = bank_cache.get(entry.bank_id)
+        if bank_data is None:
+            bank_data = bank_cache[entry.bank_id] = _load_bank(data_dir / f"BANK{entry.bank_id:02X}")
+
+        _extract_resource(resource_id, entry, bank_data, target_path)
+
+
+def _extract_resource(resource_id: int, entry: MemListEntry, bank_data: BankData, target_path: Path) -> None:
+    target_name = target_path.name
+    start = entry.bank_offset
+    end = start + entry.packed_size
+
+    if entry.packed_size == entry.unpacked_size:
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug("%s -> copied raw bytes (%d bytes)", target_name, entry.unpacked_size)
+        # Written straight from the mapped bank, without an intermediate copy.
+        with memoryview(bank_data)[start:end] as raw:
+            ensure_directory(target_path.parent)
+            with target_path.open("wb") as handle:
+                handle.write(raw)
+        return
+
+    try:
+        payload = bytekiller_decompress(bank_data[start:end], entry.unpacked_size)
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug(
+                "%s -> decompressed %d -> %d bytes",
+                target_name,
+                entry.packed_size,
+                entry.unpacked_size,
+            )
+    except ByteKillerError as exc:
+        _log.error("Failed to decompress resource %02x: %s", resource_id, exc)
+        raise
+
+    write_file(target_path, payload)
 
 
 def main() -> int:
@@ -96,7 +131,7 @@ def main() -> int:
 
     _extract_resources(args.data_dir, args.output)
 
-    logging.info("Resources unpacked to %s", args.output)
+    _log.info("Resources unpacked to %s", args.output)
     return 0
 
 